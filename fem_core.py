@@ -0,0 +1,157 @@
+"""Model assembly and solve for the Structural Analysis Tool.
+
+Kept free of Streamlit so the UI only wires inputs to build_and_solve().
+"""
+import copy
+from collections import defaultdict
+
+import numpy as np
+from anastruct import SystemElements
+from anastruct.fem import system_components
+
+# Node coordinates are snapped to a 1/COORD_SCALE grid before they reach anastruct
+COORD_SCALE = 1e6
+
+
+class _SystemElements(SystemElements):
+    """SystemElements with a cheaper stability check.
+
+    anastruct's validate() runs a full eigendecomposition of the reduced
+    stiffness matrix on every solve, which is most of the solve time. The
+    matrix is symmetric, so "all eigenvalues > min_eigen" is the same as
+    K - min_eigen * I being positive definite, which one Cholesky decides.
+    The set-up mirrors anastruct 1.7's validate(), hence the pin in
+    requirements.txt.
+    """
+
+    def validate(self, min_eigen=1e-9):
+        # Same set-up as SystemElements.validate(); only the final test differs
+        ss = copy.copy(self)
+        system_components.assembly.prep_matrix_forces(ss)
+        assert ss.system_force_vector is not None
+        assert np.abs(ss.system_force_vector).sum() != 0, "There are no forces on the structure"
+        ss._remainder_indexes = []
+        system_components.assembly.assemble_system_matrix(ss)
+        system_components.assembly.process_conditions(ss)
+
+        K = ss.reduced_system_matrix
+        assert K is not None
+        try:
+            np.linalg.cholesky(K - min_eigen * np.eye(K.shape[0]))
+        except np.linalg.LinAlgError:
+            return False
+        return True
+
+
+def compute_segments(x1, y1, x2, y2, d, L):
+    """Coordinates of the points at distances d along the member (x1, y1)->(x2, y2)."""
+    r = d * (1.0 / L)
+    return x1 + r * (x2 - x1), y1 + r * (y2 - y1)
+
+
+def apply_supports(ss, supports_tuple, user_to_ana_node):
+    """Add (user node id, support type) supports to ss, translating to anastruct node ids."""
+    for node_id, sup_type in supports_tuple:
+        if node_id not in user_to_ana_node:
+            continue
+        ana_id = user_to_ana_node[node_id]
+        if sup_type == "fixed":
+            ss.add_support_fixed(node_id=ana_id)
+        elif sup_type == "pinned":
+            ss.add_support_hinged(node_id=ana_id)
+        elif sup_type == "roller":
+            ss.add_support_roll(node_id=ana_id)
+
+
+def build_and_solve(nodes_tuple, elements_tuple, loads_tuple, supports_tuple):
+    """Build and solve the anastruct model for the frozen UI inputs.
+
+    Returns (ss, user_to_ana_node, member_to_elements).
+    """
+    ss = _SystemElements()
+    member_to_elements = {}
+    # member id -> anastruct node at its midspan split, for point loads
+    midspan_nodes = {}
+    # Quantized (x, y) -> anastruct node id, filled as elements are added. anastruct
+    # stores vertices as float32, so quantize through float32 too; then its vertices
+    # and the user's float64 coordinates give the same key
+    coord_to_ana = {}
+    key = lambda x, y: (round(float(np.float32(x)) * COORD_SCALE), round(float(np.float32(y)) * COORD_SCALE))
+
+    # 1. Add Elements
+    nodes = np.array(nodes_tuple, dtype=np.float64).reshape(-1, 3)
+    ids = nodes[:, 0].astype(np.int64)
+    coords = np.rint(nodes[:, 1:] * COORD_SCALE) / COORD_SCALE
+    node_map = dict(zip(ids.tolist(), coords.tolist()))
+    # Index loads by member once instead of scanning the load list per member
+    point_by_member = defaultdict(list)
+    dist_by_member = defaultdict(list)
+    for load_type, member_id, value in loads_tuple:
+        (point_by_member if load_type == "Point Load" else dist_by_member)[member_id].append(value)
+    members = [
+        (member_id, start, end)
+        for member_id, (start, end) in enumerate(elements_tuple, start=1)
+        if start in node_map and end in node_map
+    ]
+
+    # Member end points and lengths for every member in one pass
+    # Stable sort + side="right" picks the last row for a repeated id, as node_map does
+    order = np.argsort(ids, kind="stable")
+    member_nodes = np.array(members, dtype=np.int64).reshape(-1, 3)[:, 1:]
+    rows = order[np.searchsorted(ids, member_nodes, side="right", sorter=order) - 1]
+    # (M, 4) array of x1, y1, x2, y2 per member
+    member_coords = coords[rows].reshape(-1, 4)
+    lengths = np.hypot(member_coords[:, 2] - member_coords[:, 0], member_coords[:, 3] - member_coords[:, 1])
+
+    # Hand the loop plain floats; numpy scalar arithmetic is slower than Python's
+    for (member_id, start, end), (x1, y1, x2, y2), L in zip(members, member_coords.tolist(), lengths.tolist()):
+        # Split at midspan so point loads have a node to act on
+        distances = [0.0, L / 2, L] if member_id in point_by_member else [0.0, L]
+
+        d = np.fromiter(distances, dtype=np.float64)
+        xs, ys = compute_segments(x1, y1, x2, y2, d, L)
+        # Snap split points to the same grid so shared end nodes match the user nodes exactly
+        xs = (np.rint(xs * COORD_SCALE) / COORD_SCALE).tolist()
+        ys = (np.rint(ys * COORD_SCALE) / COORD_SCALE).tolist()
+        elem_ids = []
+        for i in range(len(d) - 1):
+            elem_id = ss.add_element(location=[[xs[i], ys[i]], [xs[i + 1], ys[i + 1]]])
+            element = ss.element_map[elem_id]
+            # anastruct swaps the ends of right-to-left elements, so read them back
+            coord_to_ana[key(element.vertex_1.x, element.vertex_1.y)] = element.node_id1
+            coord_to_ana[key(element.vertex_2.x, element.vertex_2.y)] = element.node_id2
+            elem_ids.append(elem_id)
+        member_to_elements[member_id] = elem_ids
+        if len(d) == 3:
+            # By coordinate: element node order is anastruct's, not ours
+            midspan_nodes[member_id] = coord_to_ana[key(xs[1], ys[1])]
+
+    user_to_ana_node = {
+        nid: coord_to_ana[key(x, y)] for nid, (x, y) in node_map.items() if key(x, y) in coord_to_ana
+    }
+
+    # 2. Add Supports (user node ids differ from anastruct's, so translate)
+    apply_supports(ss, supports_tuple, user_to_ana_node)
+
+    # 3. Add Loads
+    # anastruct keeps one load per node/element (later calls overwrite), so loads on the
+    # same member are summed, then applied with as few calls as its list API allows
+    point_nodes, point_values = [], []
+    q_elements = defaultdict(list)
+    for member_id, elem_ids in member_to_elements.items():
+        if member_id in point_by_member:
+            # Point load at center of element for simplicity in this version
+            point_nodes.append(midspan_nodes[member_id])
+            point_values.append(sum(point_by_member[member_id]))
+            # Note: For more precise location, we'd need an extra input for 'location ratio'
+        if member_id in dist_by_member:
+            q_elements[sum(dist_by_member[member_id])].extend(elem_ids)
+    if point_nodes:
+        ss.point_load(node_id=point_nodes, Fy=point_values)
+    # A list q means a trapezoidal (q_start, q_end) load, so one call per distinct magnitude
+    for q, elem_ids in q_elements.items():
+        ss.q_load(q=q, element_id=elem_ids)
+
+    # 4. Solve
+    ss.solve()
+    return ss, user_to_ana_node, member_to_elements
@@ -1,15 +1,117 @@
+import functools
+import hashlib
+
+import numpy as np
 import streamlit as st
 import pandas as pd
-from anastruct import SystemElements
-import matplotlib.pyplot as plt
 
 # 1. Setup Page
 st.set_page_config(page_title="Structural Analysis Tool", layout="wide")
 st.title("Structural Analysis Tool v2.0")
 
+
+@functools.lru_cache(maxsize=1)
+def _fem_core():
+    """Import fem_core on first use; anastruct pulls in scipy and pyplot, which slows startup."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import fem_core
+    return fem_core
+
+
+def state_fingerprint(state):
+    """Short digest of the frozen inputs, used as the cache key.
+
+    The numbers are hashed as packed arrays, which is much cheaper than
+    serialising the nested tuples on every fragment rerun.
+    """
+    nodes, elements, loads, supports = state
+    h = hashlib.blake2b(digest_size=16)
+    # Ids go in as float64 too: a blank node_id row gives None (NaN here), which
+    # an int cast rejects. Members stay in place since their position is their id
+    for part in (
+        np.asarray(nodes, dtype=np.float64),
+        np.asarray(elements, dtype=np.float64),
+        np.asarray([load[1:] for load in loads], dtype=np.float64),
+        np.asarray([nid for nid, _ in supports], dtype=np.float64),
+    ):
+        # Sizes go in too, so the parts (and the strings below) can't run together
+        h.update(np.int64(part.size).tobytes())
+        h.update(part.tobytes())
+    # str(): the editor returns NaN for every unset support; support_data drops those,
+    # but a stray one shouldn't break the join
+    h.update("\0".join(map(str, [load[0] for load in loads] + [sup for _, sup in supports])).encode())
+    return h.hexdigest()
+
+
+@st.cache_resource(max_entries=16)
+def build_and_solve(state_key, _state):
+    """Cached fem_core.build_and_solve().
+
+    Keyed on state_key, a digest of the frozen inputs in _state, so reruns
+    that only touch presentation (tab switches, unrelated widgets) reuse the
+    solved system. Returns (ss, user_to_ana_node, member_to_elements).
+    """
+    return _fem_core().build_and_solve(*_state)
+
+
+@st.cache_resource(max_entries=64)
+def render_figure(view, state_key, _state):
+    """Cached figure from ss.show_<view>() for the given inputs."""
+    ss = build_and_solve(state_key, _state)[0]
+    # pyplot is already loaded (on the Agg backend) by the time a system exists
+    import matplotlib.pyplot as plt
+
+    fig = getattr(ss, f"show_{view}")(show=False)
+    # Detach from pyplot so cached figures aren't kept alive twice
+    plt.close(fig)
+    return fig
+
+
+@st.fragment
+def render_results(state):
+    """Results panel. Its widgets rerun only this fragment, not the build UI."""
+    # Solve on demand only, so editing the model doesn't re-run the analysis
+    if st.button("Run Analysis", type="primary"):
+        st.session_state["analysis_state"] = state
+
+    if "analysis_state" not in st.session_state:
+        st.info("Press Run Analysis to solve the structure.")
+    else:
+        if st.session_state["analysis_state"] != state:
+            st.caption("Inputs have changed since the last run. Press Run Analysis to update the results.")
+        state = st.session_state["analysis_state"]
+
+        try:
+            # Streamlit only has to hash this short digest, not the nested tuples
+            state_key = state_fingerprint(state)
+            ss, user_to_ana_node, member_to_elements = build_and_solve(state_key, state)
+        
+            # One view at a time: st.tabs would draw every figure on each run
+            views = {
+                "Structure": ("**Structural Geometry & Reactions**", "structure"),
+                "Bending Moment": ("**Bending Moment Diagram**", "bending_moment"),
+                "Shear Force": ("**Shear Force Diagram**", "shear_force"),
+                "Deflection": ("**Displacement**", "displacement"),
+            }
+            choice = st.radio("View", list(views), horizontal=True, key="results_view")
+            title, view = views[choice]
+            st.write(title)
+            st.pyplot(render_figure(view, state_key, state))
+            
+        except Exception as e:
+            st.error(f"Analysis failed. Structure might be unstable or missing supports.\nError details: {e}")
+
+
 # Initialize Session State for Elements if not present
 if "elements" not in st.session_state:
     st.session_state["elements"] = []
+# Unordered node pairs of existing members, for O(1) duplicate checks
+if "elements_set" not in st.session_state:
+    st.session_state["elements_set"] = {frozenset(pair) for pair in st.session_state["elements"]}
+# Display tables live alongside the lists and are only touched on add/clear
+if "elements_df" not in st.session_state:
+    st.session_state["elements_df"] = pd.DataFrame(st.session_state["elements"], columns=["Start Node", "End Node"])
 
 col1, col2 = st.columns([1, 2])
 
@@ -25,7 +127,8 @@ with col1:
         ])
     
     st.caption("Edit coordinates below. Add new rows for more nodes.")
-    edited_nodes = st.data_editor(st.session_state["nodes"], num_rows="dynamic", hide_index=True)
+    # st.session_state["nodes"] stays the untouched seed; the keyed editor tracks edits as row diffs
+    edited_nodes = st.data_editor(st.session_state["nodes"], num_rows="dynamic", hide_index=True, key="nodes_editor")
     
     # --- MEMBERS ---
     st.subheader("B. Members")
@@ -38,41 +141,64 @@ with col1:
         add_elem = st.form_submit_button("Add Member")
         
         if add_elem:
-            if start_node != end_node:
-                st.session_state["elements"].append((start_node, end_node))
-            else:
+            # frozenset, not sorted(): a blank node_id row gives None, which can't be ordered
+            pair = frozenset((start_node, end_node))
+            if start_node == end_node:
                 st.error("Start and End nodes cannot be the same.")
+            elif pair in st.session_state["elements_set"]:
+                st.warning(f"A member between nodes {start_node} and {end_node} already exists.")
+            else:
+                st.session_state["elements"].append((start_node, end_node))
+                st.session_state["elements_set"].add(pair)
+                elem_df = st.session_state["elements_df"]
+                elem_df.loc[len(elem_df)] = [start_node, end_node]
 
     # Display current elements with a delete option
     if st.session_state["elements"]:
         st.write("Current Members:")
-        # Create a simple dataframe for display
-        elem_df = pd.DataFrame(st.session_state["elements"], columns=["Start Node", "End Node"])
-        st.dataframe(elem_df, hide_index=True)
+        st.dataframe(st.session_state["elements_df"], hide_index=True)
         
         if st.button("Clear All Members"):
             st.session_state["elements"] = []
+            st.session_state["elements_set"] = set()
+            st.session_state["elements_df"] = st.session_state["elements_df"].iloc[0:0]
     
     # --- SUPPORTS ---
     st.subheader("C. Supports")
-    support_data = []
-    for nid in node_ids:
-        # Create a row of checkboxes for each node
-        c1, c2, c3, c4 = st.columns([1, 1, 1, 1])
-        c1.write(f"Node {nid}")
-        fixed = c2.checkbox("Fixed", key=f"fix_{nid}")
-        pinned = c3.checkbox("Pin", key=f"pin_{nid}")
-        roller = c4.checkbox("Roll", key=f"roll_{nid}")
-        
-        if fixed: support_data.append((nid, "fixed"))
-        elif pinned: support_data.append((nid, "pinned"))
-        elif roller: support_data.append((nid, "roller"))
+    support_labels = {"fixed": "Fixed", "pinned": "Pin", "roller": "Roll"}
+    # Committed support type per node; the editor below is rebuilt from it
+    if "support_types" not in st.session_state:
+        st.session_state["support_types"] = {}
+    sup_df = pd.DataFrame({
+        "Node": node_ids,
+        "Support": [st.session_state["support_types"].get(nid) for nid in node_ids],
+    })
+    # Batch support edits in a form so each click doesn't rerun the script
+    with st.form("supports"):
+        # A single editor for all nodes instead of one widget per node
+        edited_sup = st.data_editor(
+            sup_df,
+            column_config={
+                "Support": st.column_config.SelectboxColumn(
+                    options=list(support_labels), format_func=support_labels.get
+                )
+            },
+            disabled=["Node"],
+            hide_index=True,
+            key="supports_editor",
+        )
+        st.form_submit_button("Apply Supports")
+    st.session_state["support_types"] = dict(zip(edited_sup["Node"].tolist(), edited_sup["Support"].tolist()))
+    # Unset cells come back as NaN rather than None once pandas infers a string column
+    support_data = [(nid, sup) for nid, sup in st.session_state["support_types"].items() if pd.notna(sup)]
 
     # --- LOADS ---
     st.subheader("D. Loads")
     # Initialize loads in session state
     if "loads" not in st.session_state:
         st.session_state["loads"] = []
+    if "loads_df" not in st.session_state:
+        st.session_state["loads_df"] = pd.DataFrame(st.session_state["loads"], columns=["type", "element_id", "value"])
 
     with st.form("add_load"):
         load_type = st.selectbox("Load Type", ["Point Load", "Distributed Load"])
@@ -94,13 +220,21 @@ with col1:
                 "element_id": selected_elem_idx + 1,
                 "value": val
             })
+            loads_df = st.session_state["loads_df"]
+            loads_df.loc[len(loads_df)] = [load_type, selected_elem_idx + 1, val]
 
     # Show active loads
     if st.session_state["loads"]:
         st.write("Active Loads:")
-        st.table(pd.DataFrame(st.session_state["loads"]))
+        loads_df = st.session_state["loads_df"]
+        # st.table renders every row as static HTML; switch to the virtualized grid for long lists
+        if len(loads_df) < 10:
+            st.table(loads_df)
+        else:
+            st.dataframe(loads_df, hide_index=True)
         if st.button("Clear Loads"):
             st.session_state["loads"] = []
+            st.session_state["loads_df"] = st.session_state["loads_df"].iloc[0:0]
 
 with col2:
     st.header("2. Results")
@@ -108,51 +242,11 @@ with col2:
     if not st.session_state["elements"]:
         st.info("Please define nodes and members first.")
     else:
-        ss = SystemElements()
-        
-        # 1. Add Elements
-        node_map = {row['node_id']: [row['x'], row['y']] for i, row in edited_nodes.iterrows()}
-        for start, end in st.session_state["elements"]:
-            if start in node_map and end in node_map:
-                ss.add_element(location=[node_map[start], node_map[end]])
-
-        # 2. Add Supports
-        for node_id, sup_type in support_data:
-            if sup_type == "fixed":
-                ss.add_support_fixed(node_id=node_id)
-            elif sup_type == "pinned":
-                ss.add_support_hinged(node_id=node_id)
-            elif sup_type == "roller":
-                ss.add_support_roll(node_id=node_id)
-
-        # 3. Add Loads
-        for load in st.session_state["loads"]:
-            if load["type"] == "Point Load":
-                # Point load at center of element for simplicity in this version
-                ss.point_load(node_id=None, element_id=load["element_id"], Fy=load["value"]) 
-                # Note: For more precise location, we'd need an extra input for 'location ratio'
-            elif load["type"] == "Distributed Load":
-                ss.q_load(q=load["value"], element_id=load["element_id"])
-
-        # 4. Solve
-        try:
-            ss.solve()
-            
-            # Tabs for different views
-            tab1, tab2, tab3, tab4 = st.tabs(["Structure", "Bending Moment", "Shear Force", "Deflection"])
-            
-            with tab1:
-                st.write("**Structural Geometry & Reactions**")
-                st.pyplot(ss.show_structure(show=False))
-            with tab2:
-                st.write("**Bending Moment Diagram**")
-                st.pyplot(ss.show_bending_moment(show=False))
-            with tab3:
-                st.write("**Shear Force Diagram**")
-                st.pyplot(ss.show_shear_force(show=False))
-            with tab4:
-                st.write("**Displacement**")
-                st.pyplot(ss.show_displacement(show=False))
-                
-        except Exception as e:
-            st.error(f"Analysis failed. Structure might be unstable or missing supports.\nError details: {e}")
+        # Freeze the inputs into hashable tuples so the cached solve can key on them
+        nodes_tuple = tuple(map(tuple, edited_nodes[["node_id", "x", "y"]].dropna().to_numpy().tolist()))
+        elements_tuple = tuple(st.session_state["elements"])
+        loads_tuple = tuple((load["type"], load["element_id"], load["value"]) for load in st.session_state["loads"])
+        supports_tuple = tuple(support_data)
+        state = (nodes_tuple, elements_tuple, loads_tuple, supports_tuple)
+
+        render_results(state)